@@ -4,11 +4,14 @@ Interactive CLI for the LLM Wrapper
 """
 
 import argparse
+import atexit
+import os
 import sys
 from pathlib import Path
-from llm_wrapper import LLMWrapper
 
-def main():
+HISTORY_FILE = os.path.expanduser("~/.edith_history")
+
+def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Universal Local LLM Chat")
     parser.add_argument("--model", "-m", default="llama3.2", help="Model to use")
     parser.add_argument("--url", "-u", default="http://localhost:11434", help="Base URL for LLM server")
@@ -16,14 +19,23 @@ def main():
     parser.add_argument("--system", "-s", help="System prompt")
     parser.add_argument("--message", help="Single message mode")
     parser.add_argument("--list-models", action="store_true", help="List available models")
+    return parser
+
+_PARSER = _build_parser()
+
+def main():
+    args = _PARSER.parse_args()
     
-    args = parser.parse_args()
+    # Imported after parsing so --help and usage errors skip loading requests
+    import asyncio
+    from llm_wrapper import LLMWrapper
     
-    # Initialize wrapper
+    # Initialize wrapper; one /api/tags request serves both the model list
+    # and capability detection
     llm = LLMWrapper(base_url=args.url, model=args.model)
+    models = asyncio.run(llm.warmup_async())
     
     if args.list_models:
-        models = llm.list_models()
         print("Available models:")
         for model in models:
             print(f"  - {model}")
@@ -51,53 +63,144 @@ def main():
             print(f"\n💭 Response: {response}")
     else:
         # Interactive mode
-        print("Interactive mode - type 'quit' to exit, '/image <path>' to add image, '/model <name>' to switch")
+        print("Interactive mode - type 'quit' to exit, '/image <path>' to add image, '/clear' to drop images, '/model <name>' to switch, '/stop' to cancel a reply")
         
         current_images = args.image or []
         
+        try:
+            import prompt_toolkit  # noqa: F401
+        except ImportError:
+            interactive_mode(llm, args.system, current_images)
+        else:
+            try:
+                asyncio.run(interactive_mode_async(llm, args.system, current_images))
+            except KeyboardInterrupt:
+                # Ctrl-C while waiting on an answer; asyncio.run has cancelled it
+                print("\n👋 Goodbye!")
+
+def handle_command(llm, user_input: str, current_images: list) -> bool:
+    """Run a slash command, returning True if the input was one"""
+    if user_input.startswith('/image '):
+        img_path = user_input[7:].strip()
+        if Path(img_path).exists():
+            current_images.append(img_path)
+            print(f"📷 Added image: {img_path}")
+        else:
+            print(f"❌ Image not found: {img_path}")
+        return True
+    
+    if user_input.startswith('/model '):
+        new_model = user_input[7:].strip()
+        llm.switch_model(new_model)
+        return True
+    
+    if user_input.startswith('/clear'):
+        current_images.clear()
+        print("🗑️ Cleared images")
+        return True
+    
+    if user_input == '/stop':
+        print("Nothing to stop")
+        return True
+    
+    return False
+
+def interactive_mode(llm, system_prompt, current_images):
+    """Blocking input loop, with readline history where available"""
+    try:
+        import readline
+        try:
+            readline.read_history_file(HISTORY_FILE)
+        except OSError:
+            pass
+        atexit.register(readline.write_history_file, HISTORY_FILE)
+    except ImportError:
+        pass
+    
+    while True:
+        try:
+            user_input = input("\n👤 You: ").strip()
+            
+            if user_input.lower() in ['quit', 'exit', 'q']:
+                break
+            
+            if handle_command(llm, user_input, current_images) or not user_input:
+                continue
+            
+            print("🤖 Assistant: ", end="")
+            llm.chat(
+                message=user_input,
+                images=current_images,
+                system_prompt=system_prompt
+            )
+            
+        except (KeyboardInterrupt, EOFError):
+            print("\n👋 Goodbye!")
+            break
+        except Exception as e:
+            print(f"❌ Error: {e}")
+
+async def interactive_mode_async(llm, system_prompt, current_images):
+    """
+    prompt_toolkit input loop that stays responsive while answers stream.
+    
+    The next message can be typed while the previous answer is still being
+    generated; it is sent as soon as that answer completes. '/stop' or
+    Ctrl-C cancels the answer in progress instead.
+    """
+    import asyncio
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.history import FileHistory
+    from prompt_toolkit.patch_stdout import patch_stdout
+    
+    session = PromptSession(history=FileHistory(HISTORY_FILE))
+    pending = None
+    
+    with patch_stdout():
         while True:
             try:
-                user_input = input("\n👤 You: ").strip()
-                
-                if user_input.lower() in ['quit', 'exit', 'q']:
-                    break
+                user_input = (await session.prompt_async("\n👤 You: ")).strip()
                 
-                if user_input.startswith('/image '):
-                    img_path = user_input[7:].strip()
-                    if Path(img_path).exists():
-                        current_images.append(img_path)
-                        print(f"📷 Added image: {img_path}")
-                    else:
-                        print(f"❌ Image not found: {img_path}")
+                if user_input == '/stop' and pending and not pending.done():
+                    pending.cancel()
+                    pending = None
+                    print("⏹️ Stopped")
                     continue
                 
-                if user_input.startswith('/model '):
-                    new_model = user_input[7:].strip()
-                    llm.switch_model(new_model)
-                    continue
+                # Let the previous answer finish before acting on new input
+                if pending:
+                    await pending
+                    pending = None
                 
-                if user_input.startswith('/clear'):
-                    current_images = []
-                    print("🗑️ Cleared images")
-                    continue
+                if user_input.lower() in ['quit', 'exit', 'q']:
+                    break
                 
-                if not user_input:
+                if handle_command(llm, user_input, current_images) or not user_input:
                     continue
                 
                 print("🤖 Assistant: ", end="")
-                response = llm.chat(
+                pending = asyncio.create_task(llm.achat(
                     message=user_input,
-                    images=current_images if current_images else None,
-                    system_prompt=args.system
-                )
-                
-                # Clear images after use (unless you want to keep them)
-                current_images = []
+                    images=current_images,
+                    system_prompt=system_prompt,
+                    stream=True
+                ))
                 
             except KeyboardInterrupt:
+                # Ctrl-C stops the answer in progress, or quits when there is none
+                if pending and not pending.done():
+                    pending.cancel()
+                    pending = None
+                    print("⏹️ Stopped")
+                    continue
+                print("\n👋 Goodbye!")
+                break
+            except EOFError:
+                # An answer still streaming is cancelled by asyncio.run on the way out
                 print("\n👋 Goodbye!")
                 break
             except Exception as e:
+                pending = None
                 print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
@@ -42,6 +42,13 @@ def main():
     print(f"Vision: {caps.supports_vision}")
     print(f"Thinking: {caps.supports_thinking}")
     
+    # Detailed info is an extra request, so it is only fetched on demand
+    details = llm.describe_model().get('details', {})
+    if details:
+        print(f"Family: {details.get('family')}")
+        print(f"Parameters: {details.get('parameter_size')}")
+        print(f"Quantization: {details.get('quantization_level')}")
+    
     print()
     print("=== Available Models ===")
     models = llm.list_models()
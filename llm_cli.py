@@ -9,15 +9,30 @@ import requests
 import sys
 from pathlib import Path
 
-def main():
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+
+# Shared session so repeated calls reuse the keep-alive connection
+SESSION = requests.Session()
+SESSION.headers.update({"Connection": "keep-alive"})
+
+def _build_parser():
     parser = argparse.ArgumentParser(description="Simple LLM CLI")
     parser.add_argument("message", nargs="?", help="Message to send")
     parser.add_argument("-m", "--model", default="llama3.2", help="Model to use")
     parser.add_argument("-u", "--url", default="http://localhost:11434", help="Base URL")
     parser.add_argument("--chat", action="store_true", help="Interactive mode")
     parser.add_argument("--list", action="store_true", help="List models")
-    
-    args = parser.parse_args()
+    return parser
+
+_PARSER = _build_parser()
+
+def main():
+    args = _PARSER.parse_args()
     
     if args.list:
         list_models(args.url)
@@ -29,7 +44,7 @@ def main():
 
 def list_models(base_url):
     try:
-        response = requests.get(f"{base_url}/api/tags")
+        response = SESSION.get(f"{base_url}/api/tags")
         if response.status_code == 200:
             models = response.json().get('models', [])
             print("Available models:")
@@ -75,9 +90,10 @@ def send_message(model, base_url, message):
             "stream": False
         }
         
-        response = requests.post(
+        response = SESSION.post(
             f"{base_url}/api/chat",
-            json=payload,
+            data=_json_dumps(payload),
+            headers={"Content-Type": "application/json"},
             timeout=30
         )
         
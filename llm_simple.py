@@ -5,8 +5,21 @@ Ultra-simple LLM CLI that just works
 
 import requests
 import json
+import re
 import sys
 
+try:
+    import readline  # line editing for input()
+except ImportError:
+    pass
+
+# Shared session so repeated calls reuse the keep-alive connection
+SESSION = requests.Session()
+SESSION.headers.update({"Connection": "keep-alive"})
+
+# Thinking block and the answer that follows it
+_THINK_RE = re.compile(r'(<think>.*?</think>)\s*(.*)', re.DOTALL)
+
 def chat(model="qwen3:8b", message="Hello!"):
     url = "http://localhost:11434/api/chat"
     
@@ -19,7 +32,7 @@ def chat(model="qwen3:8b", message="Hello!"):
     try:
         print(f"🤖 {model}: ", end="", flush=True)
         
-        response = requests.post(url, json=payload, timeout=120)
+        response = SESSION.post(url, json=payload, timeout=120)
         
         if response.status_code != 200:
             print(f"Error {response.status_code}: {response.text}")
@@ -29,15 +42,12 @@ def chat(model="qwen3:8b", message="Hello!"):
         content = result.get('message', {}).get('content', 'No response')
         
         # Handle thinking models - extract actual response after <think> tags
-        if '<think>' in content and '</think>' in content:
-            # Extract thinking part
-            thinking_start = content.find('<think>')
-            thinking_end = content.find('</think>') + 8
-            thinking = content[thinking_start:thinking_end]
-            actual_response = content[thinking_end:].strip()
+        match = _THINK_RE.search(content)
+        if match:
+            thinking, actual_response = match.groups()
             
             print(f"🤔 {thinking}")
-            print(f"💭 {actual_response}")
+            print(f"💭 {actual_response.strip()}")
         else:
             print(content)
         
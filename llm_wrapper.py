@@ -5,15 +5,49 @@ Dynamically detects and adapts to model capabilities like vision and thinking
 """
 
 import json
-import base64
 import requests
-from typing import Dict, List, Optional, Any, Union
-from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Iterator, List, Optional, Any, Tuple, Union
+from dataclasses import dataclass, replace
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-import mimetypes
+import re
+import sys
+import threading
 import time
 import os
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Fail fast on an unreachable server while letting long generations stream.
+# A (connect, read) tuple bounds the two phases separately.
+_CONNECT_TIMEOUT = 5
+_CHAT_TIMEOUT = (_CONNECT_TIMEOUT, 120)
+
+# Most requests chat_batch() keeps in flight at once
+_BATCH_MAX = 32
+
+# Number of base64-encoded images each wrapper keeps around
+_IMG_CACHE_SIZE = 16
+
+# Streamed output is written at most every _FLUSH_INTERVAL seconds
+# unless _FLUSH_BYTES characters are waiting
+_FLUSH_INTERVAL = 0.016
+_FLUSH_BYTES = 4096
+
 @dataclass
 class ModelCapabilities:
     """Model capability detection"""
@@ -23,13 +57,142 @@ class ModelCapabilities:
     max_tokens: int = 4096
     model_name: str = ""
 
+# Detected capabilities keyed by (base_url, model) and model lists keyed by
+# base_url, shared by all wrappers. Entries are (expires_at, value).
+_CAPS_TTL = 600
+_MODELS_TTL = 60
+_CAPS_CACHE: Dict[Tuple[str, str], Tuple[float, ModelCapabilities]] = {}
+_MODELS_CACHE: Dict[str, Tuple[float, List[str]]] = {}
+
+def _cache_lookup(cache: Dict, key: Any) -> Any:
+    """Return a cached value, or None if it is missing or expired"""
+    entry = cache.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+def _compile_indicators(indicators: List[str]) -> "re.Pattern[str]":
+    """Combine name indicators into one pattern matched in a single scan"""
+    if not indicators:
+        return re.compile(r'(?!)')  # never matches
+    return re.compile('|'.join(map(re.escape, indicators)))
+
+@lru_cache(maxsize=1024)
+def _guess_mime_type(file_path: str) -> Optional[str]:
+    """Guess a file's MIME type from its name"""
+    import mimetypes  # only needed for vision requests
+    return mimetypes.guess_type(file_path)[0]
+
+class _ThinkSplitter:
+    """Single-pass splitter for <think>...</think> blocks in streamed text"""
+    
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+    
+    def __init__(self):
+        self.in_think = False
+        self._pending = ""
+    
+    def feed(self, text: str) -> List[Tuple[bool, str]]:
+        """Split a chunk into (is_thinking, text) segments"""
+        buf = self._pending + text if self._pending else text
+        segments = []
+        pos = 0
+        while True:
+            tag = self.CLOSE_TAG if self.in_think else self.OPEN_TAG
+            idx = buf.find(tag, pos)
+            if idx == -1:
+                break
+            if idx > pos:
+                segments.append((self.in_think, buf[pos:idx]))
+            pos = idx + len(tag)
+            self.in_think = not self.in_think
+        
+        # Hold back a trailing partial tag until the next chunk arrives
+        end = len(buf)
+        for n in range(min(len(tag) - 1, end - pos), 0, -1):
+            if buf.endswith(tag[:n]):
+                end -= n
+                break
+        if end > pos:
+            segments.append((self.in_think, buf[pos:end]))
+        self._pending = buf[end:]
+        return segments
+    
+    def flush(self) -> List[Tuple[bool, str]]:
+        """Return any text held back at the end of the stream"""
+        pending, self._pending = self._pending, ""
+        return [(self.in_think, pending)] if pending else []
+
+class _StreamWriter:
+    """Coalesce streamed tokens into fewer stdout writes"""
+    
+    def __init__(self):
+        self._stream = sys.stdout
+        self._buf: List[str] = []
+        self._size = 0
+        self._last_flush = time.monotonic()
+    
+    def write(self, text: str):
+        self._buf.append(text)
+        self._size += len(text)
+        now = time.monotonic()
+        if self._size >= _FLUSH_BYTES or now - self._last_flush >= _FLUSH_INTERVAL:
+            self.flush(now)
+    
+    def flush(self, now: Optional[float] = None):
+        if self._buf:
+            self._stream.write(''.join(self._buf))
+            self._stream.flush()
+            self._buf.clear()
+            self._size = 0
+        self._last_flush = now if now is not None else time.monotonic()
+
+def create_session(pool_connections: int = 4,
+                   pool_maxsize: int = 16,
+                   retries: int = 2,
+                   backoff_factor: float = 0.1) -> requests.Session:
+    """Create a keep-alive session so requests reuse pooled connections"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(total=retries, backoff_factor=backoff_factor)
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # requests already sends Accept-Encoding for every codec urllib3 can decode
+    # (gzip/deflate, plus br/zstd when brotli/zstandard are installed)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
 class LLMWrapper:
-    def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama3.2", config_file: str = "config.json"):
+    def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama3.2",
+                 config_file: str = "config.json", lazy: bool = True,
+                 session: Optional[requests.Session] = None):
         self.base_url = base_url.rstrip('/')
         self.model = model
-        self.capabilities = ModelCapabilities()
+        self._capabilities: Optional[ModelCapabilities] = None
+        self.session = session or create_session()
+        self._io_pool = ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 2) * 2))
+        self._img_cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._img_cache_lock = threading.Lock()
         self.config = self._load_config(config_file)
-        self._detect_capabilities()
+        self._vision_re = _compile_indicators(self.config.get('vision_models', []))
+        self._thinking_re = _compile_indicators(self.config.get('thinking_models', []))
+        if not lazy:
+            self._detect_capabilities()
+    
+    @property
+    def capabilities(self) -> ModelCapabilities:
+        """Model capabilities, detected on first use"""
+        if self._capabilities is None:
+            self._detect_capabilities()
+        return self._capabilities
+    
+    @capabilities.setter
+    def capabilities(self, value: ModelCapabilities):
+        self._capabilities = value
     
     def _load_config(self, config_file: str) -> Dict:
         """Load configuration from JSON file"""
@@ -47,69 +210,201 @@ class LLMWrapper:
             "model_aliases": {}
         }
     
-    def _detect_capabilities(self):
-        """Auto-detect what the model can do"""
+    def _detect_capabilities(self, refresh: bool = False, model_names: Optional[List[str]] = None):
+        """Auto-detect what the model can do, optionally from an already fetched model list"""
+        key = (self.base_url, self.model)
+        cached = None if refresh else _cache_lookup(_CAPS_CACHE, key)
+        if cached:
+            self._specialize(replace(cached))
+            return
+        
+        caps = ModelCapabilities()
         try:
-            # Check if server is reachable
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            if response.status_code == 200:
-                models = response.json().get('models', [])
-                current_model = next((m for m in models if self.model in m['name']), None)
+            if model_names is None:
+                model_names = _cache_lookup(_MODELS_CACHE, self.base_url)
+            if model_names is None:
+                # Check if server is reachable
+                response = self.session.get(f"{self.base_url}/api/tags", timeout=5)
+                if response.status_code == 200:
+                    model_names = [m['name'] for m in response.json().get('models', [])]
+                    _MODELS_CACHE[self.base_url] = (time.monotonic() + _MODELS_TTL, model_names)
+            
+            if model_names:
+                current_model = next((name for name in model_names if self.model in name), None)
                 
                 if current_model:
-                    self.capabilities.model_name = current_model['name']
-                    model_name_lower = current_model['name'].lower()
+                    caps.model_name = current_model
+                    model_name_lower = current_model.lower()
                     
                     # Check for vision capabilities using config
-                    vision_indicators = self.config.get('vision_models', [])
-                    if any(indicator in model_name_lower for indicator in vision_indicators):
-                        self.capabilities.supports_vision = True
+                    if self._vision_re.search(model_name_lower):
+                        caps.supports_vision = True
                     
                     # Check for thinking capabilities using config
-                    thinking_indicators = self.config.get('thinking_models', [])
-                    if any(indicator in model_name_lower for indicator in thinking_indicators):
-                        self.capabilities.supports_thinking = True
-                        
-                    # Try to get more detailed model info
-                    try:
-                        model_info = requests.post(f"{self.base_url}/api/show", 
-                                                 json={"name": self.model}, timeout=5)
-                        if model_info.status_code == 200:
-                            info = model_info.json()
-                            # Extract additional capabilities from model info if available
-                            pass
-                    except:
-                        pass
+                    if self._thinking_re.search(model_name_lower):
+                        caps.supports_thinking = True
+                    
+                    _CAPS_CACHE[key] = (time.monotonic() + _CAPS_TTL, replace(caps))
                         
         except requests.exceptions.RequestException as e:
             print(f"Warning: Could not connect to LLM server at {self.base_url}: {e}")
         except Exception as e:
             print(f"Warning: Could not detect capabilities: {e}")
+        
+        self._specialize(caps)
+    
+    def _specialize(self, caps: ModelCapabilities):
+        """Precompute the per-model parts of every chat payload, then publish caps"""
+        self._payload_skel = {"model": self.model}
+        self._base_options = {"thinking": True} if caps.supports_thinking else None
+        self._attach_images = (self._attach_images_vision if caps.supports_vision
+                               else self._attach_images_noop)
+        # Set last so concurrent callers never see a half-specialized wrapper
+        self.capabilities = caps
+    
+    def _attach_images_vision(self, user_message: Dict, images: Optional[List[str]]):
+        """Add images to the message; files are read concurrently so disk latency overlaps"""
+        if not images:
+            return
+        image_data = [data for data in self._io_pool.map(self._load_image, images)
+                      if data is not None]
+        if image_data:
+            user_message["images"] = image_data
+    
+    def _attach_images_noop(self, user_message: Dict, images: Optional[List[str]]):
+        """Images are dropped for models without vision"""
+        if images:
+            print("⚠️  Model doesn't support vision - ignoring images")
     
     def _encode_image(self, image_path: str) -> str:
-        """Convert image to base64"""
+        """Convert image to base64, reusing the encoding of an unchanged file"""
+        st = os.stat(image_path)
+        key = (image_path, st.st_mtime_ns, st.st_size)
+        with self._img_cache_lock:
+            cached = self._img_cache.get(key)
+            if cached is not None:
+                self._img_cache.move_to_end(key)
+                return cached
+        
+        encoded = self._read_image_base64(image_path)
+        with self._img_cache_lock:
+            self._img_cache[key] = encoded
+            if len(self._img_cache) > _IMG_CACHE_SIZE:
+                self._img_cache.popitem(last=False)
+        return encoded
+    
+    def _read_image_base64(self, image_path: str) -> str:
+        """Read an image file and encode it as base64"""
+        import mmap
+        try:
+            import pybase64 as base64  # SIMD-accelerated, same API as the stdlib module
+        except ImportError:
+            import base64
+        
         with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
+            # mmap cannot map empty files
+            if os.fstat(image_file.fileno()).st_size == 0:
+                return ""
+            # Encode straight from the page cache instead of copying into a buffer first
+            with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                return base64.b64encode(view).decode('ascii')
     
     def _is_image_file(self, file_path: str) -> bool:
         """Check if file is an image"""
-        mime_type, _ = mimetypes.guess_type(file_path)
-        return mime_type and mime_type.startswith('image/')  
+        mime_type = _guess_mime_type(file_path)
+        return bool(mime_type and mime_type.startswith('image/'))
+    
+    def _load_image(self, image_path: str) -> Optional[str]:
+        """Encode an image, or return None if it is missing or not an image"""
+        if self._is_image_file(image_path) and Path(image_path).exists():
+            return self._encode_image(image_path)
+        return None
   
     def chat(self, 
              message: str, 
              images: Optional[List[str]] = None,
              system_prompt: Optional[str] = None,
-             stream: bool = True) -> Union[str, Any]:
+             stream: bool = True,
+             stop: Optional[threading.Event] = None) -> Union[str, Any]:
         """
-        Universal chat method that adapts to model capabilities
+        Universal chat method that adapts to model capabilities.
+        A streamed reply ends early once the optional stop event is set.
         """
         
-        # Build the request payload
-        payload = {
-            "model": self.model,
-            "stream": stream
-        }
+        payload = self._build_payload(message, images, system_prompt, stream)
+        return self._make_request(payload, stream, stop)
+    
+    def chat_batch(self,
+                   messages: List[str],
+                   system_prompt: Optional[str] = None) -> List[Union[str, Any]]:
+        """
+        Send several independent messages at once over the pooled session.
+        
+        Results come back in input order. The server batches concurrent
+        requests itself (see OLLAMA_NUM_PARALLEL), so total time grows far
+        more slowly than sending them one by one.
+        """
+        if not messages:
+            return []
+        self.capabilities  # detect once here rather than in every worker
+        with ThreadPoolExecutor(max_workers=min(_BATCH_MAX, len(messages))) as pool:
+            return list(pool.map(
+                lambda message: self.chat(message, system_prompt=system_prompt, stream=False),
+                messages
+            ))
+    
+    def stream_chat(self,
+                    message: str,
+                    images: Optional[List[str]] = None,
+                    system_prompt: Optional[str] = None) -> Iterator[Tuple[bool, str]]:
+        """
+        Yield (is_thinking, text) pieces of the reply as they arrive,
+        without printing. Connection and HTTP errors are raised.
+        """
+        payload = self._build_payload(message, images, system_prompt, True)
+        response = self._send_json("POST", "/api/chat", payload, stream=True, timeout=_CHAT_TIMEOUT)
+        with response:
+            self._raise_for_error(response)
+            yield from self._iter_stream(response)
+    
+    def complete_chat(self,
+                      message: str,
+                      images: Optional[List[str]] = None,
+                      system_prompt: Optional[str] = None) -> Dict:
+        """
+        Return the raw non-streaming /api/chat reply without printing.
+        Connection and HTTP errors are raised, as is an error reported in the reply.
+        """
+        payload = self._build_payload(message, images, system_prompt, False)
+        response = self._send_json("POST", "/api/chat", payload, timeout=_CHAT_TIMEOUT)
+        self._raise_for_error(response)
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        if 'error' in data or 'message' not in data:
+            raise requests.HTTPError(data.get('error', "Reply has no message"), response=response)
+        return data
+    
+    @staticmethod
+    def _raise_for_error(response: requests.Response):
+        """Raise HTTPError for a failed reply, with the server's own message when it sends one"""
+        if response.status_code == 200:
+            return
+        try:
+            error = response.json().get('error')
+        except (ValueError, AttributeError):
+            error = None
+        raise requests.HTTPError(error or f"{response.status_code} {response.reason}", response=response)
+    
+    def _build_payload(self,
+                       message: str,
+                       images: Optional[List[str]],
+                       system_prompt: Optional[str],
+                       stream: bool) -> Dict:
+        """Build the /api/chat request body"""
+        if self._capabilities is None:
+            self._detect_capabilities()
         
         # Handle messages
         messages = []
@@ -121,101 +416,209 @@ class LLMWrapper:
         # Build user message
         user_message = {"role": "user", "content": message}
         
-        # Handle images if model supports vision
-        if images and self.capabilities.supports_vision:
-            # For models that support vision, add images to the message
-            image_data = []
-            for img_path in images:
-                if Path(img_path).exists() and self._is_image_file(img_path):
-                    image_data.append(self._encode_image(img_path))
-            
-            if image_data:
-                user_message["images"] = image_data
-        elif images and not self.capabilities.supports_vision:
-            print("⚠️  Model doesn't support vision - ignoring images")
+        # Handle images (bound to the vision or no-op handler at detection time)
+        self._attach_images(user_message, images)
         
         messages.append(user_message)
-        payload["messages"] = messages
         
-        # Handle thinking models
-        if self.capabilities.supports_thinking:
-            # For thinking models, we might want to add special parameters
-            payload["options"] = payload.get("options", {})
-            payload["options"]["thinking"] = True
+        # Build the request payload from the per-model skeleton
+        payload = self._payload_skel | {"stream": stream, "messages": messages}
+        
+        # Thinking models get their options set at detection time
+        if self._base_options:
+            payload["options"] = dict(self._base_options)
+        
+        return payload
+    
+    async def achat(self,
+                    message: str,
+                    images: Optional[List[str]] = None,
+                    system_prompt: Optional[str] = None,
+                    stream: bool = False) -> Union[str, Any]:
+        """
+        Async variant of chat() so independent requests can overlap:
+
+            answers = await asyncio.gather(llm.achat("a"), llm.achat("b"))
+
+        The request runs on a worker thread over the shared session, so total
+        wall time is roughly that of the slowest call rather than the sum.
+        Cancelling the task stops a streamed reply at the next chunk.
+        """
+        import asyncio
         
-        return self._make_request(payload, stream)
+        stop = threading.Event()
+        try:
+            return await asyncio.to_thread(self.chat, message, images, system_prompt, stream, stop)
+        except asyncio.CancelledError:
+            stop.set()  # the worker thread can't be cancelled, so tell it to stop
+            raise
     
-    def _make_request(self, payload: Dict, stream: bool) -> Union[str, Any]:
+    async def warmup_async(self) -> List[str]:
+        """
+        Fetch the model list and detect capabilities off the event loop.
+        
+        Both come from the same /api/tags response, so a lazily constructed
+        wrapper is fully initialized after a single round trip. Returns the
+        available model names.
+        """
+        import asyncio
+        
+        def warmup() -> List[str]:
+            models = self.list_models()
+            if models:
+                self._detect_capabilities(model_names=models)
+            return models
+        
+        return await asyncio.to_thread(warmup)
+    
+    def _send_json(self, method: str, path: str, payload: Dict, **kwargs) -> requests.Response:
+        """Send a pre-serialized JSON body to the server"""
+        return self.session.request(
+            method,
+            f"{self.base_url}{path}",
+            data=_json_dumps(payload),
+            headers=_JSON_HEADERS,
+            **kwargs
+        )
+    
+    def _make_request(self, payload: Dict, stream: bool,
+                      stop: Optional[threading.Event] = None) -> Union[str, Any]:
         """Make the actual API request"""
         try:
-            response = requests.post(
-                f"{self.base_url}/api/chat",
-                json=payload,
-                stream=stream
+            response = self._send_json(
+                "POST", "/api/chat", payload,
+                stream=stream,
+                timeout=_CHAT_TIMEOUT
             )
             
             if stream:
-                return self._handle_stream(response)
+                return self._handle_stream(response, stop)
             else:
                 return response.json()
                 
         except Exception as e:
             return f"Error: {e}"
     
-    def _handle_stream(self, response):
-        """Handle streaming responses"""
-        full_response = ""
-        thinking_content = ""
+    def _iter_stream(self, response) -> Iterator[Tuple[bool, str]]:
+        """Yield (is_thinking, text) pieces from a streaming /api/chat response"""
+        splitter = _ThinkSplitter()
         
         for line in response.iter_lines():
             if line:
                 try:
-                    data = json.loads(line.decode('utf-8'))
-                    
-                    if 'message' in data:
-                        content = data['message'].get('content', '')
-                        
-                        # Handle thinking models
-                        if self.capabilities.supports_thinking and 'thinking' in data['message']:
-                            thinking_content += data['message']['thinking']
-                            print(f"🤔 Thinking: {data['message']['thinking']}", end='', flush=True)
-                        else:
-                            full_response += content
-                            print(content, end='', flush=True)
-                    
-                    if data.get('done', False):
-                        break
-                        
+                    data = _json_loads(line)
                 except json.JSONDecodeError:
                     continue
+                
+                # Failures after the 200 header arrive as an error line
+                if 'error' in data:
+                    raise requests.HTTPError(data['error'], response=response)
+                
+                if 'message' in data:
+                    message = data['message']
+                    
+                    # Handle thinking models
+                    if self.capabilities.supports_thinking and message.get('thinking'):
+                        yield True, message['thinking']
+                    
+                    # Route inline <think>...</think> blocks to the thinking output
+                    yield from splitter.feed(message.get('content', ''))
+                
+                if data.get('done', False):
+                    break
         
-        print()  # New line after streaming
+        yield from splitter.flush()
+    
+    def _handle_stream(self, response, stop: Optional[threading.Event] = None):
+        """Handle streaming responses"""
+        full_response = ""
+        thinking_content = ""
+        was_thinking = False
+        out = _StreamWriter()
+        
+        for is_thinking, text in self._iter_stream(response):
+            if stop is not None and stop.is_set():
+                # Dropping the connection also ends the generation server-side
+                response.close()
+                break
+            if is_thinking:
+                thinking_content += text
+            else:
+                if thinking_content and not full_response:
+                    # Drop the blank lines models emit after a thinking block
+                    text = text.lstrip()
+                    if not text:
+                        continue
+                full_response += text
+            out.write(self._stream_label(is_thinking, was_thinking) + text)
+            was_thinking = is_thinking
+        
+        out.write("\n")  # New line after streaming
+        out.flush()
         return {
             "response": full_response,
-            "thinking": thinking_content if self.capabilities.supports_thinking else None
+            "thinking": thinking_content or None
         }
     
+    @staticmethod
+    def _stream_label(is_thinking: bool, was_thinking: bool) -> str:
+        """Prefix marking a switch between thinking and answer output"""
+        if is_thinking and not was_thinking:
+            return "🤔 "
+        if was_thinking and not is_thinking:
+            return "\n💭 "
+        return ""
+    
+    @staticmethod
+    def invalidate_caps_cache():
+        """Forget all cached capability detections and the model lists they came from"""
+        _CAPS_CACHE.clear()
+        _MODELS_CACHE.clear()
+    
     def get_capabilities(self) -> ModelCapabilities:
-        """Get current model capabilities"""
+        """Get current model capabilities, re-detected once the shared cache entry expires"""
+        self._detect_capabilities()
         return self.capabilities
     
-    def list_models(self) -> List[str]:
-        """List available models"""
+    def describe_model(self) -> Dict:
+        """Get detailed model info (modelfile, parameters, template)"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags")
+            response = self._send_json("POST", "/api/show", {"name": self.model}, timeout=5)
             if response.status_code == 200:
-                models = response.json().get('models', [])
-                return [model['name'] for model in models]
+                return response.json()
         except Exception as e:
+            print(f"Error describing model: {e}")
+        return {}
+    
+    def list_models(self, refresh: bool = False, raise_errors: bool = False) -> List[str]:
+        """
+        List available models, reusing a list fetched in the last minute.
+        A failed fetch returns [] unless raise_errors is set.
+        """
+        cached = None if refresh else _cache_lookup(_MODELS_CACHE, self.base_url)
+        if cached is not None:
+            return list(cached)
+        
+        try:
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=_CONNECT_TIMEOUT)
+            self._raise_for_error(response)
+            models = response.json().get('models', [])
+            names = [model['name'] for model in models]
+            _MODELS_CACHE[self.base_url] = (time.monotonic() + _MODELS_TTL, names)
+            return list(names)
+        except Exception as e:
+            if raise_errors:
+                raise
             print(f"Error listing models: {e}")
         return []
     
+    def resolve_model_name(self, model_name: str) -> str:
+        """Expand a configured alias to its model name"""
+        return self.config.get('model_aliases', {}).get(model_name, model_name)
+    
     def switch_model(self, model_name: str):
         """Switch to a different model"""
-        # Check if it's an alias
-        if model_name in self.config.get('model_aliases', {}):
-            model_name = self.config['model_aliases'][model_name]
-        
+        model_name = self.resolve_model_name(model_name)
         self.model = model_name
         self._detect_capabilities()
         print(f"Switched to {model_name}")
@@ -225,25 +628,36 @@ class LLMWrapper:
         """Pull/download a model"""
         try:
             print(f"Pulling model {model_name}...")
-            response = requests.post(
-                f"{self.base_url}/api/pull",
-                json={"name": model_name},
+            response = self._send_json(
+                "POST", "/api/pull", {"name": model_name},
                 stream=True,
-                timeout=300
+                timeout=(_CONNECT_TIMEOUT, None)  # bound the connect only; large pulls stream for a long time
             )
             
-            for line in response.iter_lines():
+            last_print = 0.0
+            for line in response.iter_lines(chunk_size=65536):
                 if line:
                     try:
-                        data = json.loads(line.decode('utf-8'))
-                        if 'status' in data:
-                            print(f"\r{data['status']}", end='', flush=True)
-                        if data.get('completed'):
+                        data = _json_loads(line)
+                        if 'error' in data:
+                            print(f"\n❌ Error pulling model: {data['error']}")
+                            return False
+                        if data.get('status') == 'success':
+                            _MODELS_CACHE.pop(self.base_url, None)
                             print(f"\n✅ Model {model_name} pulled successfully")
                             return True
+                        # Progress lines arrive far faster than a terminal can usefully show them
+                        now = time.monotonic()
+                        if 'status' in data and now - last_print >= 0.1:
+                            sys.stdout.write(f"\r{data['status']:<60}")
+                            sys.stdout.flush()
+                            last_print = now
                     except json.JSONDecodeError:
                         continue
             
+            print(f"\n❌ Pull of {model_name} ended without success")
+            return False
+            
         except Exception as e:
             print(f"❌ Error pulling model: {e}")
             return False
@@ -251,8 +665,10 @@ class LLMWrapper:
     def delete_model(self, model_name: str) -> bool:
         """Delete a model"""
         try:
-            response = requests.delete(f"{self.base_url}/api/delete", json={"name": model_name})
+            response = self._send_json("DELETE", "/api/delete", {"name": model_name},
+                                       timeout=(_CONNECT_TIMEOUT, 30))
             if response.status_code == 200:
+                _MODELS_CACHE.pop(self.base_url, None)
                 print(f"✅ Model {model_name} deleted")
                 return True
             else:
@@ -265,7 +681,7 @@ class LLMWrapper:
     def health_check(self) -> bool:
         """Check if the LLM server is healthy"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=5)
             return response.status_code == 200
         except:
             return False
@@ -2,12 +2,15 @@
 import requests
 import json
 
+SESSION = requests.Session()
+SESSION.headers.update({"Connection": "keep-alive"})
+
 # Test basic connectivity
 print("Testing Ollama connection...")
 
 try:
     # Check if server is up
-    response = requests.get("http://localhost:11434/api/tags", timeout=5)
+    response = SESSION.get("http://localhost:11434/api/tags", timeout=5)
     print(f"✅ Server is up: {response.status_code}")
     
     models = response.json().get('models', [])
@@ -22,7 +25,7 @@ try:
     }
     
     print("Sending request...")
-    response = requests.post("http://localhost:11434/api/chat", json=payload, timeout=120)
+    response = SESSION.post("http://localhost:11434/api/chat", json=payload, timeout=120)
     
     if response.status_code == 200:
         result = response.json()
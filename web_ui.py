@@ -3,116 +3,542 @@
 Simple web UI for the LLM Wrapper
 """
 
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, Response, abort, g, request, session, stream_with_context
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import gzip
+import hashlib
+import json
 import os
+import queue
+import re
+import signal
+import threading
 import uuid
-from llm_wrapper import LLMWrapper
+import requests
+from llm_wrapper import LLMWrapper, create_session
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_dumps(obj):
+        return json.dumps(obj).encode('utf-8')
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-change-this'
 
-# Global LLM instance
-llm = None
+# One keep-alive pool shared by every wrapper, sized for concurrent requests
+app.config['HTTP_SESSION'] = create_session(
+    pool_connections=50,
+    pool_maxsize=50,
+    retries=3,
+    backoff_factor=0.2
+)
+
+DEFAULT_BASE_URL = 'http://localhost:11434'
+
+# Keep-alive connections opened to the backend before the first request
+PREWARM_CONNECTIONS = 4
+
+def _prewarm(base_url=DEFAULT_BASE_URL):
+    """Open pooled connections to the backend so the first chat skips the handshake"""
+    http = app.config['HTTP_SESSION']
+    
+    def probe(_):
+        try:
+            http.get(f"{base_url}/api/tags", timeout=5).close()
+        except Exception:
+            pass  # the backend may not be up yet; requests will connect on demand
+    
+    # Concurrent probes each check out their own connection, filling the pool
+    with ThreadPoolExecutor(max_workers=PREWARM_CONNECTIONS) as pool:
+        list(pool.map(probe, range(PREWARM_CONNECTIONS)))
+
+def _start_prewarm(*_):
+    threading.Thread(target=_prewarm, daemon=True).start()
+
+def start_prewarm(on_sighup=False):
+    """Prewarm in the background, and again on every SIGHUP if asked"""
+    _start_prewarm()
+    if on_sighup and hasattr(signal, 'SIGHUP'):
+        try:
+            signal.signal(signal.SIGHUP, _start_prewarm)
+        except ValueError:
+            pass  # not called from the main thread
+
+# Wrappers shared by all browser sessions, keyed by (base_url, model).
+# Sessions only store a key, so one user switching models never changes
+# the wrapper another user is chatting through. Least recently used
+# wrappers are dropped past WRAPPER_POOL_SIZE and rebuilt on demand.
+WRAPPER_POOL_SIZE = 32
+_WRAPPERS: "OrderedDict[tuple, LLMWrapper]" = OrderedDict()
+_wrappers_lock = threading.RLock()
+
+# Completed chat responses keyed by a hash of (backend, model, system prompt, message).
+# An in-process LRU, backed by Redis when EDITH_CACHE_URL is set.
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_TTL = 4 * 3600  # seconds, Redis only
+_response_cache: "OrderedDict[str, dict]" = OrderedDict()
+_response_cache_lock = threading.Lock()
+_redis = None
+if os.environ.get('EDITH_CACHE_URL'):
+    try:
+        import redis
+        _redis = redis.Redis.from_url(os.environ['EDITH_CACHE_URL'])
+    except ImportError:
+        print("Warning: EDITH_CACHE_URL is set but the redis package is not installed")
+
+# Chat generations in progress, keyed like the response cache, so identical
+# concurrent requests share one backend call
+_INFLIGHT = {}
+_inflight_lock = threading.Lock()
+
+# Open /api/events streams per backend URL, each fed through its own queue,
+# and the model list last pushed to them. Both are per process: with several
+# gunicorn workers a change is only pushed to streams held by the worker
+# that noticed it.
+EVENTS_KEEPALIVE = 15  # seconds between comment lines on an idle stream
+_SUBSCRIBERS = {}
+_PUSHED_MODELS = {}
+_subscribers_lock = threading.Lock()
+
+# Serialized init/switch_model bodies keyed by (model, vision, thinking, streaming).
+# Only models found on a server are kept, so client-chosen names can't grow it.
+_CAPS_JSON = {}
+
+# HTTP status for an exception type, matched against the exception's MRO
+_ERROR_CODES = {
+    requests.exceptions.ConnectionError: 503,
+    ConnectionError: 503,
+    requests.exceptions.Timeout: 504,
+    TimeoutError: 504,
+    requests.exceptions.HTTPError: 502,  # the backend answered with an error
+    ValueError: 400
+}
+
+# Inline reasoning block emitted by thinking models
+_THINK_RE = re.compile(r'<think>(.*?)</think>\s*', re.DOTALL)
+
+def _cache_key(base_url, model, system_prompt, message):
+    raw = '\x00'.join((base_url, model, system_prompt or '', message))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def _cache_get(key):
+    with _response_cache_lock:
+        result = _response_cache.get(key)
+        if result is not None:
+            _response_cache.move_to_end(key)
+            return result
+    
+    if _redis is not None:
+        try:
+            raw = _redis.get('edith:chat:' + key)
+        except Exception:
+            raw = None  # the cache is best-effort
+        if raw:
+            result = _json_loads(raw)
+            _cache_put(key, result, shared=False)
+            return result
+    return None
+
+def _cache_put(key, result, shared=True):
+    if not result.get('response'):
+        return  # an empty answer means the generation failed; let the next request retry
+    
+    with _response_cache_lock:
+        _response_cache[key] = result
+        _response_cache.move_to_end(key)
+        if len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+    
+    if shared and _redis is not None:
+        try:
+            _redis.setex('edith:chat:' + key, RESPONSE_CACHE_TTL, _json_dumps(result))
+        except Exception:
+            pass
+
+def _claim_flight(key):
+    """Return (future, leader); the leader must resolve the future and call _end_flight"""
+    with _inflight_lock:
+        future = _INFLIGHT.get(key)
+        leader = future is None
+        if leader:
+            future = _INFLIGHT[key] = Future()
+    return future, leader
+
+def _end_flight(key):
+    with _inflight_lock:
+        del _INFLIGHT[key]
+
+def _single_flight(key, fn):
+    """Run fn once for all concurrent callers with the same key"""
+    future, leader = _claim_flight(key)
+    if not leader:
+        return future.result()
+    
+    try:
+        result = fn()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _end_flight(key)
+
+def _parse_chat_response(response):
+    """Turn a non-streaming /api/chat reply into the UI's response/thinking pair"""
+    message = response.get('message', {})
+    content = message.get('content', '')
+    thinking = message.get('thinking')
+    
+    match = _THINK_RE.search(content)
+    if match:
+        thinking = match.group(1).strip()
+        content = content[:match.start()] + content[match.end():]
+    
+    return {'response': content.strip(), 'thinking': thinking or None}
+
+def _sse_event(data):
+    return b"data: " + _json_dumps(data) + b"\n\n"
+
+def _publish_current_models(llm):
+    """Push the backend's model list, skipping the push if the fetch fails"""
+    try:
+        models = llm.list_models(raise_errors=True)
+    except Exception:
+        return None  # an empty list would clear every subscriber's dropdown
+    _publish_models(llm.base_url, models)
+    return models
+
+def _publish_models(base_url, models):
+    """Push a model list to the backend's subscribers if it changed since the last push"""
+    with _subscribers_lock:
+        if _PUSHED_MODELS.get(base_url) == models:
+            return
+        _PUSHED_MODELS[base_url] = models
+        queues = list(_SUBSCRIBERS.get(base_url, ()))
+    
+    message = {'type': 'models', 'models': models}
+    for q in queues:
+        q.put(message)
+
+def _wrapper_for(base_url, model, register=True):
+    """Pooled wrapper for (base_url, model); unregistered ones are built fresh but not kept"""
+    key = (base_url.rstrip('/'), model)
+    with _wrappers_lock:
+        wrapper = _WRAPPERS.get(key)
+        if wrapper is not None:
+            _WRAPPERS.move_to_end(key)
+            return wrapper
+    
+    wrapper = LLMWrapper(base_url=key[0], model=model, session=app.config['HTTP_SESSION'])
+    return _register_wrapper(wrapper) if register else wrapper
+
+def _register_wrapper(wrapper):
+    """Add a wrapper to the pool, returning the pooled one if another request won the race"""
+    key = (wrapper.base_url, wrapper.model)
+    with _wrappers_lock:
+        wrapper = _WRAPPERS.setdefault(key, wrapper)
+        _WRAPPERS.move_to_end(key)
+        if len(_WRAPPERS) > WRAPPER_POOL_SIZE:
+            _WRAPPERS.popitem(last=False)
+    return wrapper
+
+def _get_wrapper():
+    """Wrapper chosen by the calling browser session, or None before /api/init"""
+    key = session.get('wrapper_key')
+    return _wrapper_for(*key) if key else None
+
+def _json_response(obj, status=200):
+    return Response(_json_dumps(obj), status=status, mimetype='application/json')
+
+def _caps_response(llm, caps):
+    """init/switch_model reply, serialized once per model and capability set"""
+    model = caps.model_name or llm.model
+    key = (model, caps.supports_vision, caps.supports_thinking, caps.supports_streaming)
+    body = _CAPS_JSON.get(key)
+    if body is None:
+        body = _json_dumps({
+            'success': True,
+            'model': model,
+            'capabilities': {
+                'vision': caps.supports_vision,
+                'thinking': caps.supports_thinking,
+                'streaming': caps.supports_streaming
+            }
+        })
+        if caps.model_name:
+            _CAPS_JSON[key] = body
+    return Response(body, mimetype='application/json')
+
+def _error_body(e):
+    # Exception class name plus its first argument, shown by the page as "error: detail"
+    return {'error': type(e).__name__, 'detail': str(e.args[0]) if e.args else ''}
+
+def _err(e):
+    status = next((_ERROR_CODES[cls] for cls in type(e).__mro__ if cls in _ERROR_CODES), 500)
+    return _json_response(_error_body(e), status)
+
+def _request_json():
+    """Decode the request body, treating an empty body as {}"""
+    # Read once without keeping a copy on the request; nothing else needs the raw body
+    body = request.get_data(cache=False)
+    data = _json_loads(body) if body else {}
+    if not isinstance(data, dict):
+        abort(_json_response({'error': 'JSON body must be an object'}, 400))
+    return data
+
+def _chat_fields(data):
+    """Message and system prompt from a chat body; both must be strings when given"""
+    message = data.get('message', '')
+    system_prompt = data.get('system_prompt')
+    if not isinstance(message, str) or not isinstance(system_prompt, (str, type(None))):
+        abort(_json_response({'error': 'message and system_prompt must be strings'}, 400))
+    return message, system_prompt or None
+
+@app.before_request
+def _bind_wrapper():
+    # Resolve the session's wrapper once; handlers work from this per-request
+    # snapshot even if another request re-points the session meanwhile
+    g.llm = _get_wrapper()
+
+@app.errorhandler(json.JSONDecodeError)
+def invalid_json(e):
+    return _json_response({'error': 'Invalid JSON body'}, 400)
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    body, etag, headers = _INDEX_BYTES, _INDEX_ETAG, {
+        'Cache-Control': 'public, max-age=3600',
+        'Vary': 'Accept-Encoding'
+    }
+    for encoding in ('br', 'gzip'):
+        if encoding in _INDEX_ENCODED and request.accept_encodings[encoding] > 0:
+            body = _INDEX_ENCODED[encoding]
+            etag = f"{_INDEX_ETAG}-{encoding}"
+            headers['Content-Encoding'] = encoding
+            break
+    
+    response = Response(body, mimetype='text/html', headers=headers)
+    response.set_etag(etag)
+    # Answers 304 Not Modified when the browser already has this version
+    return response.make_conditional(request)
 
 @app.route('/api/init', methods=['POST'])
 def init_llm():
-    global llm
-    data = request.json
+    data = _request_json()
     
     try:
-        llm = LLMWrapper(
-            base_url=data.get('base_url', 'http://localhost:11434'),
-            model=data.get('model', 'llama3.2')
+        llm = _wrapper_for(
+            data.get('base_url', DEFAULT_BASE_URL),
+            data.get('model', 'llama3.2'),
+            register=False
         )
         
         if not llm.health_check():
-            return jsonify({'error': 'Cannot connect to LLM server'}), 500
+            return _json_response({'error': 'Cannot connect to LLM server'}, 503)
         
+        # Only reachable backends enter the pool; the URL comes from the client
+        llm = _register_wrapper(llm)
+        session['wrapper_key'] = [llm.base_url, llm.model]
         caps = llm.get_capabilities()
-        return jsonify({
-            'success': True,
-            'model': caps.model_name or llm.model,
-            'capabilities': {
-                'vision': caps.supports_vision,
-                'thinking': caps.supports_thinking,
-                'streaming': caps.supports_streaming
-            }
-        })
+        _publish_current_models(llm)
+        return _caps_response(llm, caps)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return _err(e)
 
 @app.route('/api/models')
 def get_models():
-    global llm
+    llm = g.llm
+    if not llm:
+        return _json_response({'error': 'LLM not initialized'}), 400
+    
+    # Explicit reloads bypass the cache so new or deleted models show up
+    try:
+        models = llm.list_models(refresh=True, raise_errors=True)
+    except Exception as e:
+        return _err(e)
+    
+    _publish_models(llm.base_url, models)
+    return _json_response({'models': models})
+
+@app.route('/api/events')
+def events():
+    """Server-Sent Events channel pushing the model list whenever it changes"""
+    llm = g.llm
     if not llm:
-        return jsonify({'error': 'LLM not initialized'}), 400
+        return _json_response({'error': 'LLM not initialized'}), 400
+    
+    base_url = llm.base_url
+    
+    def generate():
+        # Unreachable backend: stay subscribed and wait for a later push
+        models = _publish_current_models(llm)
+        
+        q = queue.Queue()
+        with _subscribers_lock:
+            _SUBSCRIBERS.setdefault(base_url, set()).add(q)
+        try:
+            if models is not None:
+                yield _sse_event({'type': 'models', 'models': models})
+            while True:
+                try:
+                    message = q.get(timeout=EVENTS_KEEPALIVE)
+                except queue.Empty:
+                    # Comment line; lets the server notice a closed tab
+                    yield b": keepalive\n\n"
+                    continue
+                yield _sse_event(message)
+        finally:
+            with _subscribers_lock:
+                subscribers = _SUBSCRIBERS.get(base_url)
+                subscribers.discard(q)
+                if not subscribers:
+                    del _SUBSCRIBERS[base_url]
     
-    models = llm.list_models()
-    return jsonify({'models': models})
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
-    global llm
+    llm = g.llm
     if not llm:
-        return jsonify({'error': 'LLM not initialized'}), 400
+        return _json_response({'error': 'LLM not initialized'}), 400
     
-    data = request.json
-    message = data.get('message', '')
-    system_prompt = data.get('system_prompt')
+    message, system_prompt = _chat_fields(_request_json())
+    
+    key = _cache_key(llm.base_url, llm.model, system_prompt, message)
+    result = _cache_get(key)
+    if result is not None:
+        resp = _json_response(result)
+        resp.headers['X-Cache'] = 'HIT'
+        return resp
+    
+    def generate():
+        # Raises on backend failures, so errors are never cached as answers
+        response = llm.complete_chat(message, system_prompt=system_prompt)
+        
+        # Cached before the in-flight entry is dropped, so no identical
+        # request can slip in between and start a second generation
+        result = _parse_chat_response(response)
+        _cache_put(key, result)
+        return result
     
     try:
-        response = llm.chat(
-            message=message,
-            system_prompt=system_prompt,
-            stream=False  # For web UI, we'll use non-streaming for simplicity
-        )
+        result = _single_flight(key, generate)
+    except Exception as e:
+        return _err(e)
+    
+    resp = _json_response(result)
+    resp.headers['X-Cache'] = 'MISS'
+    return resp
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Stream a reply as Server-Sent Events, one event per token"""
+    wrapper = g.llm
+    if not wrapper:
+        return _json_response({'error': 'LLM not initialized'}), 400
+    
+    message, system_prompt = _chat_fields(_request_json())
+    key = _cache_key(wrapper.base_url, wrapper.model, system_prompt, message)
+    
+    def replay(result):
+        if result.get('thinking'):
+            yield _sse_event({'thinking': result['thinking']})
+        yield _sse_event({'token': result['response']})
+        yield _sse_event({'done': True})
+    
+    def generate():
+        cached = _cache_get(key)
+        if cached is not None:
+            yield from replay(cached)
+            return
         
-        if isinstance(response, dict):
-            return jsonify({
-                'response': response.get('response', ''),
-                'thinking': response.get('thinking')
-            })
+        # Identical requests already generating (streamed or not) are
+        # waited on and replayed rather than sent to the backend again
+        future, leader = _claim_flight(key)
+        if not leader:
+            try:
+                result = future.result()
+            except Exception as e:
+                yield _sse_event(_error_body(e))
+                yield _sse_event({'done': True})
+            else:
+                yield from replay(result)
+            return
+        
+        thinking, answer = [], []
+        try:
+            for is_thinking, text in wrapper.stream_chat(message, system_prompt=system_prompt):
+                if not is_thinking and not answer:
+                    # Drop the blank lines models emit after a thinking block
+                    text = text.lstrip()
+                    if not text:
+                        continue
+                (thinking if is_thinking else answer).append(text)
+                yield _sse_event({'thinking': text} if is_thinking else {'token': text})
+        except Exception as e:
+            future.set_exception(e)
+            yield _sse_event(_error_body(e))
+        except GeneratorExit:
+            # The leader's client went away mid-reply; release the waiters
+            future.set_exception(ConnectionError("Generation was cancelled"))
+            raise
         else:
-            return jsonify({'response': str(response)})
-            
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+            result = {
+                'response': ''.join(answer).strip(),
+                'thinking': ''.join(thinking).strip() or None
+            }
+            _cache_put(key, result)
+            future.set_result(result)
+        finally:
+            _end_flight(key)
+        yield _sse_event({'done': True})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/api/switch_model', methods=['POST'])
 def switch_model():
-    global llm
+    llm = g.llm
     if not llm:
-        return jsonify({'error': 'LLM not initialized'}), 400
+        return _json_response({'error': 'LLM not initialized'}), 400
     
-    data = request.json
+    data = _request_json()
     model_name = data.get('model')
+    if not model_name:
+        return _json_response({'error': 'No model given'}), 400
     
     try:
-        llm.switch_model(model_name)
+        llm = _wrapper_for(llm.base_url, llm.resolve_model_name(model_name), register=False)
+        # Capability detection falls back to defaults when the backend is down
+        if not llm.health_check():
+            return _json_response({'error': 'Cannot connect to LLM server'}, 503)
+        
+        llm = _register_wrapper(llm)
+        session['wrapper_key'] = [llm.base_url, llm.model]
         caps = llm.get_capabilities()
+        _publish_current_models(llm)
         
-        return jsonify({
-            'success': True,
-            'model': caps.model_name or llm.model,
-            'capabilities': {
-                'vision': caps.supports_vision,
-                'thinking': caps.supports_thinking,
-                'streaming': caps.supports_streaming
-            }
-        })
+        return _caps_response(llm, caps)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return _err(e)
 
-if __name__ == '__main__':
-    # Create templates directory if it doesn't exist
-    os.makedirs('templates', exist_ok=True)
-    
-    # Create a simple HTML template
-    html_template = '''
+# Page served by index(), kept in memory instead of written to templates/
+html_template = '''
 <!DOCTYPE html>
 <html>
 <head>
@@ -120,7 +546,7 @@ if __name__ == '__main__':
     <style>
         body { font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }
         .chat-container { border: 1px solid #ddd; height: 400px; overflow-y: auto; padding: 10px; margin: 10px 0; }
-        .message { margin: 10px 0; padding: 10px; border-radius: 5px; }
+        .message { margin: 10px 0; padding: 10px; border-radius: 5px; white-space: pre-wrap; }
         .user { background-color: #e3f2fd; text-align: right; }
         .assistant { background-color: #f5f5f5; }
         .thinking { background-color: #fff3e0; font-style: italic; }
@@ -161,6 +587,7 @@ if __name__ == '__main__':
 
     <script>
         let currentModel = null;
+        let modelEvents = null;
         
         function showStatus(message, isError = false) {
             const status = document.getElementById('status');
@@ -168,6 +595,10 @@ if __name__ == '__main__':
             status.className = 'status ' + (isError ? 'error' : 'success');
         }
         
+        function errorText(data) {
+            return data.detail ? data.error + ': ' + data.detail : data.error;
+        }
+        
         function initLLM() {
             const baseUrl = document.getElementById('baseUrl').value;
             const model = document.getElementById('model').value;
@@ -180,12 +611,12 @@ if __name__ == '__main__':
             .then(response => response.json())
             .then(data => {
                 if (data.error) {
-                    showStatus('Error: ' + data.error, true);
+                    showStatus('Error: ' + errorText(data), true);
                 } else {
                     currentModel = data.model;
                     showStatus('Connected to ' + data.model);
                     updateCapabilities(data.capabilities);
-                    loadModels();
+                    subscribeModels();
                 }
             })
             .catch(error => showStatus('Error: ' + error, true));
@@ -203,25 +634,41 @@ if __name__ == '__main__':
             capsDiv.style.display = 'block';
         }
         
+        function renderModels(models) {
+            const select = document.getElementById('modelSelect');
+            select.innerHTML = '';
+            models.forEach(model => {
+                const option = document.createElement('option');
+                option.value = model;
+                option.textContent = model;
+                if (model === currentModel) option.selected = true;
+                select.appendChild(option);
+            });
+            select.style.display = 'block';
+        }
+        
         function loadModels() {
             fetch('/api/models')
             .then(response => response.json())
             .then(data => {
-                if (data.models) {
-                    const select = document.getElementById('modelSelect');
-                    select.innerHTML = '';
-                    data.models.forEach(model => {
-                        const option = document.createElement('option');
-                        option.value = model;
-                        option.textContent = model;
-                        if (model === currentModel) option.selected = true;
-                        select.appendChild(option);
-                    });
-                    select.style.display = 'block';
+                if (data.error) {
+                    showStatus('Error: ' + errorText(data), true);
+                } else {
+                    renderModels(data.models);
                 }
             });
         }
         
+        // The server pushes the model list on connect and whenever it changes
+        function subscribeModels() {
+            if (modelEvents) modelEvents.close();
+            modelEvents = new EventSource('/api/events');
+            modelEvents.onmessage = function(event) {
+                const data = JSON.parse(event.data);
+                if (data.type === 'models') renderModels(data.models);
+            };
+        }
+        
         function switchModel() {
             const select = document.getElementById('modelSelect');
             const model = select.value;
@@ -234,7 +681,7 @@ if __name__ == '__main__':
             .then(response => response.json())
             .then(data => {
                 if (data.error) {
-                    showStatus('Error: ' + data.error, true);
+                    showStatus('Error: ' + errorText(data), true);
                 } else {
                     currentModel = data.model;
                     showStatus('Switched to ' + data.model);
@@ -252,26 +699,55 @@ if __name__ == '__main__':
             addMessage('user', message);
             document.getElementById('messageInput').value = '';
             
-            fetch('/api/chat', {
+            let thinkingDiv = null;
+            let assistantDiv = null;
+            
+            function handleEvent(data) {
+                if (data.thinking) {
+                    if (!thinkingDiv) thinkingDiv = addMessage('thinking', 'Thinking: ');
+                    appendText(thinkingDiv, data.thinking);
+                }
+                if (data.token) {
+                    if (!assistantDiv) assistantDiv = addMessage('assistant', '');
+                    appendText(assistantDiv, data.token);
+                }
+                if (data.error) {
+                    addMessage('assistant', 'Error: ' + errorText(data));
+                }
+            }
+            
+            // Tokens are appended as the server streams them. POSTed with fetch
+            // rather than EventSource so long messages stay out of the URL.
+            fetch('/api/chat/stream', {
                 method: 'POST',
                 headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({
-                    message: message,
-                    system_prompt: systemPrompt || null
-                })
+                body: JSON.stringify({message: message, system_prompt: systemPrompt || null})
             })
-            .then(response => response.json())
-            .then(data => {
-                if (data.error) {
-                    addMessage('assistant', 'Error: ' + data.error);
-                } else {
-                    if (data.thinking) {
-                        addMessage('thinking', 'Thinking: ' + data.thinking);
-                    }
-                    addMessage('assistant', data.response);
+            .then(response => {
+                if (!response.ok) {
+                    return response.json().then(handleEvent);
                 }
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                
+                function read() {
+                    return reader.read().then(({done, value}) => {
+                        if (done) return;
+                        buffer += decoder.decode(value, {stream: true});
+                        const events = buffer.split('\\n\\n');
+                        buffer = events.pop();  // keep a partial event for the next chunk
+                        events.forEach(event => {
+                            if (event.startsWith('data: ')) handleEvent(JSON.parse(event.slice(6)));
+                        });
+                        return read();
+                    });
+                }
+                return read();
             })
-            .catch(error => addMessage('assistant', 'Error: ' + error));
+            .catch(() => {
+                if (!assistantDiv) addMessage('assistant', 'Error: connection lost');
+            });
         }
         
         function addMessage(role, content) {
@@ -281,6 +757,13 @@ if __name__ == '__main__':
             div.innerHTML = '<strong>' + role.charAt(0).toUpperCase() + role.slice(1) + ':</strong><br>' + content;
             container.appendChild(div);
             container.scrollTop = container.scrollHeight;
+            return div;
+        }
+        
+        function appendText(div, text) {
+            const container = document.getElementById('chatContainer');
+            div.appendChild(document.createTextNode(text));
+            container.scrollTop = container.scrollHeight;
         }
         
         function clearChat() {
@@ -297,10 +780,27 @@ if __name__ == '__main__':
     </script>
 </body>
 </html>
-    '''
-    
-    with open('templates/index.html', 'w') as f:
-        f.write(html_template)
-    
+'''
+
+# Minified by dropping indentation and blank lines; line breaks are kept so
+# the inline script parses exactly as written
+_INDEX_BYTES = '\n'.join(
+    line.strip() for line in html_template.splitlines() if line.strip()
+).encode('utf-8')
+_INDEX_ETAG = hashlib.md5(_INDEX_BYTES, usedforsecurity=False).hexdigest()
+
+# Compressed once at import so requests never pay for compression
+_INDEX_ENCODED = {'gzip': gzip.compress(_INDEX_BYTES, compresslevel=9, mtime=0)}
+try:
+    import brotli
+    _INDEX_ENCODED['br'] = brotli.compress(_INDEX_BYTES, quality=11)
+except ImportError:
+    pass
+
+if __name__ == '__main__':
     print("🌐 Starting web UI at http://localhost:5000")
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    print("   Development server - use 'gunicorn -k gevent wsgi:app' for production")
+    # SIGHUP keeps its default here, so closing the terminal still stops the server
+    start_prewarm()
+    # Set FLASK_DEBUG=1 for the reloader and debugger.
+    app.run(host='0.0.0.0', port=5000)
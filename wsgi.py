@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for serving the web UI in production
+
+    gunicorn -k gevent -w 4 --worker-connections 200 --timeout 120 --bind 0.0.0.0:5000 wsgi:app
+"""
+
+# Patch before requests/urllib3 are imported so backend calls yield to
+# other greenlets instead of blocking the worker
+from gevent import monkey
+monkey.patch_all()
+
+from web_ui import app, start_prewarm  # noqa: E402
+
+# Runs in each worker; gunicorn workers don't use SIGHUP themselves
+start_prewarm(on_sighup=True)